@@ -1,16 +1,29 @@
 # app.py — Updated with Resend Email Verification
 from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file
 from werkzeug.utils import secure_filename
+from werkzeug.security import generate_password_hash, check_password_hash
 import os
+import multiprocessing
+import queue
 import threading
+import time
 from datetime import datetime, timedelta
 import json
 import secrets
 import urllib.request
-
-from modules.nlp_processor import extract_text_from_file, extract_skills, calculate_similarity
-from modules.database import init_db, get_db, close_db
-from modules.report_generator import generate_pdf_report
+import orjson
+from psycopg2.extras import execute_values
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+from modules.nlp_processor import (extract_text_from_bytes, extract_text_cached,
+                                   file_content_key, get_cached_text, remember_text,
+                                   extract_skills, calculate_similarity,
+                                   calculate_similarities_precleaned, clean_text,
+                                   clean_job_description, load_nlp_resources)
+from modules.database import init_db, get_db, close_db, close_pool, release_db_connections, json_as_text
+from modules.report_generator import generate_pdf_report, report_filepath, REPORTS_FOLDER
 
 # ============================================================
 # APP SETUP
@@ -19,12 +32,18 @@ from modules.report_generator import generate_pdf_report
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'resume_matcher_secret_key_2024')
 
-UPLOAD_FOLDER = 'static/uploads'
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Behind a web server that understands X-Sendfile (Apache mod_xsendfile,
+# lighttpd, or nginx set up to honour it), let it stream downloaded reports
+# straight from disk instead of piping the bytes through Python
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'doc'}
 
-os.makedirs('static/uploads', exist_ok=True)
-os.makedirs('static/reports', exist_ok=True)
+# First bytes of the files we can read: PDFs start with "%PDF",
+# DOCX files are ZIP archives which start with "PK"
+FILE_SIGNATURES = (b'%PDF', b'PK\x03\x04')
+
+os.makedirs(REPORTS_FOLDER, exist_ok=True)
 
 # ============================================================
 # EMAIL CONFIGURATION
@@ -35,6 +54,16 @@ APP_URL        = os.environ.get('APP_URL', 'https://ai-resumeiq.onrender.com')
 
 with app.app_context():
     init_db()
+    # With gunicorn --preload this runs in the master process. Its pooled
+    # connections would be copied into every worker, and a worker closing
+    # its copy would cut off the others, so close them before the fork.
+    close_pool()
+    # Load NLP data now rather than on the first request
+    # (and before gunicorn --preload forks its workers)
+    load_nlp_resources()
+
+# Return pooled DB connections even if a route raised an error
+app.teardown_appcontext(release_db_connections)
 
 # ============================================================
 # HELPER FUNCTIONS
@@ -44,6 +73,33 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def has_valid_signature(file):
+    """Peek at the first bytes of an upload to check it really is a PDF/DOCX."""
+    head = file.stream.read(8)
+    file.stream.seek(0)
+    return head.startswith(FILE_SIGNATURES)
+
+
+def password_matches(stored, password):
+    """
+    Check a login password against the one saved in the users table.
+    Accounts created before passwords were hashed still hold plain text.
+    """
+    if is_password_hash(stored):
+        return check_password_hash(stored, password)
+    return secrets.compare_digest(stored.encode(), password.encode())
+
+
+def is_password_hash(stored):
+    """True if stored is a werkzeug hash, e.g. 'scrypt:32768:8:1$...'."""
+    return stored.startswith(('scrypt:', 'pbkdf2:'))
+
+
+def jsonify_fast(data):
+    """Like jsonify(), but serializes with orjson (much faster on large payloads)."""
+    return app.response_class(orjson.dumps(data), mimetype='application/json')
+
+
 def send_verification_email(to_email, username, token):
     """Send a verification email via Resend API (HTTPS — works on Render free plan)."""
     verify_url = f"{APP_URL}/verify-email/{token}"
@@ -116,6 +172,154 @@ def send_email_async(to_email, username, token):
     thread.start()
 
 
+# ============================================================
+# BACKGROUND ANALYSIS WRITER
+# Saves analyses after the response has been sent, so users
+# don't wait for the database commit
+# ============================================================
+
+pending_analyses = queue.Queue()
+analysis_writer  = ThreadPoolExecutor(max_workers=1)
+
+
+def save_analysis_async(row):
+    """Queue an analyses row to be inserted in the background."""
+    pending_analyses.put(row)
+    analysis_writer.submit(write_pending_analyses)
+
+
+# execute_values() fills in VALUES %s with one (...) per row,
+# so a whole batch goes to the database as a single INSERT
+INSERT_ANALYSIS_SQL = '''INSERT INTO analyses
+    (id, user_id, resume_filename, ats_score, matched_skills, missing_skills,
+     career_suggestions, resume_tips, created_at)
+    VALUES %s'''
+
+
+def write_pending_analyses():
+    """Insert every queued analysis in one batch with a single commit."""
+    rows = []
+    while True:
+        try:
+            rows.append(pending_analyses.get_nowait())
+        except queue.Empty:
+            break
+
+    # An earlier run already picked up these rows
+    if not rows:
+        return
+
+    conn = None
+    try:
+        conn = get_db()
+        cur  = conn.cursor()
+        try:
+            execute_values(cur, INSERT_ANALYSIS_SQL, rows, page_size=len(rows))
+            conn.commit()
+        except Exception as e:
+            # One bad row (e.g. its user was deleted) fails the whole batch,
+            # so undo it and save the rows one by one instead
+            conn.rollback()
+            print(f"⚠️ Batch save of {len(rows)} analyses failed, retrying one by one: {e}")
+            for row in rows:
+                try:
+                    execute_values(cur, INSERT_ANALYSIS_SQL, [row])
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    print(f"❌ Could not save analysis {row[0]} (user {row[1]}): {e}")
+        cur.close()
+    except Exception as e:
+        print(f"❌ Could not save analyses {[row[0] for row in rows]}: {e}")
+    finally:
+        # Always give the connection back — there's no request teardown
+        # in this background thread to do it for us
+        close_db(conn)
+
+
+# ============================================================
+# RESUME PARSING WORKERS
+# PyPDF2 is pure Python, so threads would just take turns on the
+# GIL — separate processes parse several resumes truly in parallel
+# ============================================================
+
+EXTRACTION_WORKERS = min(os.cpu_count() or 1, 4)
+EXTRACTION_TIMEOUT = 60   # seconds a batch may take before it's given up on
+
+# Workers come from a small "fork server" process instead of being forked
+# from this one. This process already runs threads (the analysis writer,
+# the request threads), and a lock one of them held at the moment of a fork
+# (e.g. the one print() uses) would stay locked forever in the child.
+# The fork server imports the parsing code (and, as by default, the main
+# script) once, so the workers it starts don't have to.
+# Spawn is used where there is no fork server (Windows).
+if 'forkserver' in multiprocessing.get_all_start_methods():
+    EXTRACTION_CONTEXT = multiprocessing.get_context('forkserver')
+    EXTRACTION_CONTEXT.set_forkserver_preload(['__main__', 'modules.nlp_processor'])
+else:
+    EXTRACTION_CONTEXT = multiprocessing.get_context('spawn')
+
+# Kept alive between requests so processes aren't started every time.
+# Created on first use in each server process (not before gunicorn forks).
+extraction_pool      = None
+extraction_pool_pid  = None
+extraction_pool_lock = threading.Lock()
+
+
+def get_extraction_pool():
+    global extraction_pool, extraction_pool_pid
+    if extraction_pool is None or extraction_pool_pid != os.getpid():
+        with extraction_pool_lock:
+            if extraction_pool is None or extraction_pool_pid != os.getpid():
+                extraction_pool     = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS,
+                                                          mp_context=EXTRACTION_CONTEXT)
+                extraction_pool_pid = os.getpid()
+    return extraction_pool
+
+
+def reset_extraction_pool(old_pool):
+    """
+    Throw away a pool that broke (a worker crashed inside a PDF library,
+    or was killed for using too much memory) or got stuck. Its workers
+    are stopped, and the next get_extraction_pool() starts a fresh one.
+    """
+    global extraction_pool
+    with extraction_pool_lock:
+        if extraction_pool is old_pool:
+            extraction_pool = None
+    # A stuck worker would never pick up the shutdown, so stop it directly
+    for process in list((old_pool._processes or {}).values()):
+        process.kill()
+    old_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_texts_in_parallel(datas, filenames):
+    """
+    Text of each file (as bytes), parsed in the worker processes.
+
+    Files are never parsed in this process: a file that crashes a
+    worker would crash the web server too. If a worker dies, the batch
+    is tried once more in a fresh pool. If that fails as well, or the
+    batch takes longer than EXTRACTION_TIMEOUT, every file in it gets ""
+    (no text), like any other file that can't be read.
+    """
+    for attempt in range(2):
+        pool = get_extraction_pool()
+        try:
+            return list(pool.map(extract_text_from_bytes, datas, filenames,
+                                 timeout=EXTRACTION_TIMEOUT))
+        except BrokenProcessPool:
+            print(f"⚠️ A resume parsing process died (attempt {attempt + 1}) — restarting the pool")
+            reset_extraction_pool(pool)
+        except TimeoutError:
+            print(f"⚠️ Parsing {len(datas)} resumes took over {EXTRACTION_TIMEOUT}s — restarting the pool")
+            reset_extraction_pool(pool)
+            break
+
+    print(f"❌ Could not parse {filenames}")
+    return [""] * len(datas)
+
+
 # ============================================================
 # ROUTES
 # ============================================================
@@ -145,7 +349,7 @@ def signup():
 
         if existing:
             if existing['is_verified']:
-                cur.close(); conn.close()
+                cur.close(); close_db(conn)
                 return jsonify({'success': False, 'message': 'Email already registered. Please login.'})
             else:
                 token = secrets.token_urlsafe(32)
@@ -155,7 +359,7 @@ def signup():
                     (token, expires_at, email)
                 )
                 conn.commit()
-                cur.close(); conn.close()
+                cur.close(); close_db(conn)
                 send_email_async(email, username, token)
                 return jsonify({'success': True, 'message': 'Verification email resent! Please check your inbox.'})
 
@@ -165,10 +369,10 @@ def signup():
         cur.execute(
             '''INSERT INTO users (username, email, password, is_verified, verify_token, token_expires, created_at)
                VALUES (%s, %s, %s, %s, %s, %s, %s)''',
-            (username, email, password, True, None, None, datetime.now().isoformat())
+            (username, email, generate_password_hash(password), True, None, None, datetime.now().isoformat())
         )
         conn.commit()
-        cur.close(); conn.close()
+        cur.close(); close_db(conn)
 
         return jsonify({'success': True, 'message': 'Account created! You can now login.'})
 
@@ -179,17 +383,17 @@ def signup():
 def verify_email(token):
     conn = get_db()
     cur  = conn.cursor()
-    cur.execute('SELECT * FROM users WHERE verify_token = %s', (token,))
+    cur.execute('SELECT id, username, token_expires FROM users WHERE verify_token = %s', (token,))
     user = cur.fetchone()
 
     if not user:
-        cur.close(); conn.close()
+        cur.close(); close_db(conn)
         return render_template('verify_result.html',
                                success=False,
                                message='Invalid or expired verification link.')
 
     if datetime.now() > datetime.fromisoformat(user['token_expires']):
-        cur.close(); conn.close()
+        cur.close(); close_db(conn)
         return render_template('verify_result.html',
                                success=False,
                                message='Verification link has expired. Please signup again.')
@@ -199,7 +403,7 @@ def verify_email(token):
         (True, None, user['id'])
     )
     conn.commit()
-    cur.close(); conn.close()
+    cur.close(); close_db(conn)
 
     return render_template('verify_result.html',
                            success=True,
@@ -214,19 +418,30 @@ def login():
 
         conn = get_db()
         cur  = conn.cursor()
-        cur.execute('SELECT * FROM users WHERE email = %s AND password = %s', (email, password))
+        # Look the account up by email (an index lookup), then check
+        # the password hash in Python
+        cur.execute('SELECT id, username, password, is_admin, is_verified FROM users WHERE email = %s',
+                    (email,))
         user = cur.fetchone()
-        cur.close(); conn.close()
 
-        if not user:
+        if not user or not password_matches(user['password'], password):
+            cur.close(); close_db(conn)
             return jsonify({'success': False, 'message': 'Invalid email or password'})
 
+        # Old account with a plain-text password: hash it now
+        if not is_password_hash(user['password']):
+            cur.execute('UPDATE users SET password = %s WHERE id = %s',
+                        (generate_password_hash(password), user['id']))
+            conn.commit()
+        cur.close(); close_db(conn)
+
         if not user['is_verified']:
             return jsonify({'success': False,
                             'message': '⚠️ Please verify your email first. Check your inbox for the verification link.'})
 
         session['user_id']  = user['id']
         session['username'] = user['username']
+        session['is_admin'] = bool(user['is_admin'])
         return jsonify({'success': True, 'redirect': '/dashboard'})
 
     return render_template('login.html')
@@ -246,13 +461,15 @@ def dashboard():
     conn = get_db()
     cur  = conn.cursor()
     cur.execute(
-        'SELECT * FROM analyses WHERE user_id = %s ORDER BY created_at DESC LIMIT 5',
+        '''SELECT id, resume_filename, ats_score, created_at FROM analyses
+           WHERE user_id = %s ORDER BY created_at DESC LIMIT 5''',
         (session['user_id'],)
     )
     analyses = cur.fetchall()
-    cur.close(); conn.close()
+    cur.close(); close_db(conn)
 
-    return render_template('dashboard.html', username=session['username'], analyses=analyses)
+    return render_template('dashboard.html', username=session['username'], analyses=analyses,
+                           is_admin=session.get('is_admin', False))
 
 
 @app.route('/analyzer')
@@ -278,23 +495,30 @@ def analyze_resume():
     if file.filename == '' or not allowed_file(file.filename):
         return jsonify({'error': 'Only PDF and DOCX files are allowed'}), 400
 
-    filename  = secure_filename(file.filename)
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename  = f"{timestamp}_{filename}"
-    filepath  = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(filepath)
+    # Reject files that are only named .pdf/.docx before doing any work
+    if not has_valid_signature(file):
+        return jsonify({'error': 'Only PDF and DOCX files are allowed'}), 400
 
-    resume_text = extract_text_from_file(filepath)
+    # Read the text straight from the upload. Nothing ever reads the
+    # file again, so it is never written to disk.
+    resume_text = extract_text_cached(file.read(), file.filename)
     if not resume_text:
         return jsonify({'error': 'Could not read the resume file'}), 400
 
+    # The name recorded with the analysis (shown on the dashboard)
+    now       = datetime.now()
+    filename  = secure_filename(file.filename)
+    timestamp = now.strftime('%Y%m%d_%H%M%S')
+    filename  = f"{timestamp}_{filename}"
+
     resume_skills = extract_skills(resume_text)
     jd_skills     = extract_skills(job_description)
 
-    matched_skills = list(set([s.lower() for s in resume_skills]).intersection(
-                     set([s.lower() for s in jd_skills])))
-    missing_skills = list(set([s.lower() for s in jd_skills]) -
-                     set([s.lower() for s in resume_skills]))
+    # Both are sets of lowercase skills, so compare them directly.
+    # Sorted once here, these lists are reused as-is for the database,
+    # the response and the suggestions, always in the same order.
+    matched_skills = sorted(resume_skills & jd_skills)
+    missing_skills = sorted(jd_skills - resume_skills)
 
     similarity  = calculate_similarity(resume_text, job_description)
     skill_ratio = (len(matched_skills) / max(len(jd_skills), 1)) * 100
@@ -303,23 +527,31 @@ def analyze_resume():
     career_suggestions = get_career_suggestions(matched_skills, missing_skills)
     resume_tips        = get_resume_tips(ats_score, missing_skills)
 
+    # Reserve the id now (no commit needed) so the response can include it;
+    # the row itself is written by the background writer.
+    # Autocommit sends just this one statement: no BEGIN before it, and
+    # no ROLLBACK when the pool takes the connection back.
+    # The finally puts autocommit back even if the query fails, so the
+    # next user of this pooled connection gets a normal one.
     conn = get_db()
-    cur  = conn.cursor()
-    cur.execute(
-        '''INSERT INTO analyses
-           (user_id, resume_filename, ats_score, matched_skills, missing_skills,
-            career_suggestions, resume_tips, created_at)
-           VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id''',
-        (session['user_id'], filename, ats_score,
-         json.dumps(matched_skills), json.dumps(missing_skills),
-         json.dumps(career_suggestions), json.dumps(resume_tips),
-         datetime.now().isoformat())
-    )
-    analysis_id = cur.fetchone()['id']
-    conn.commit()
-    cur.close(); conn.close()
-
-    return jsonify({
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        cur.execute("SELECT nextval(pg_get_serial_sequence('analyses', 'id')) AS id")
+        analysis_id = cur.fetchone()['id']
+        cur.close()
+    finally:
+        conn.autocommit = False
+        close_db(conn)
+
+    save_analysis_async((
+        analysis_id, session['user_id'], filename, ats_score,
+        orjson.dumps(matched_skills).decode(), orjson.dumps(missing_skills).decode(),
+        orjson.dumps(career_suggestions).decode(), orjson.dumps(resume_tips).decode(),
+        now.isoformat()
+    ))
+
+    return jsonify_fast({
         'success':             True,
         'analysis_id':         analysis_id,
         'ats_score':           ats_score,
@@ -343,59 +575,107 @@ def rank_resumes():
     if len(files) < 2:
         return jsonify({'error': 'Please upload at least 2 resumes'}), 400
 
+    # Phase 1: read the text of every upload
+    # Rankings aren't saved, so the files never need to touch the disk.
+    # Each file is independent, so they are parsed in parallel processes.
+    # Files read before are taken from the cache; only new ones are parsed.
+    uploads = [file for file in files if file and allowed_file(file.filename)]
+    datas   = [file.read() for file in uploads]
+    keys    = [file_content_key(data, file.filename) for file, data in zip(uploads, datas)]
+    texts   = [get_cached_text(key) for key in keys]
+
+    to_parse = [i for i, text in enumerate(texts) if text is None]
+    if to_parse:
+        parsed = extract_texts_in_parallel([datas[i] for i in to_parse],
+                                           [uploads[i].filename for i in to_parse])
+        for i, text in zip(to_parse, parsed):
+            texts[i] = text
+            # Don't cache a failed parse; it may work next time
+            if text:
+                remember_text(keys[i], text)
+
+    resumes = [(file.filename, text) for file, text in zip(uploads, texts) if text]
+
+    # Phase 2: score them — the JD is the same for every resume,
+    # so its skills and cleaned text are worked out once
+    jd_skills = extract_skills(job_description)
+    jd_clean  = clean_job_description(job_description)
+
+    # All similarity scores in one go (lets the optional
+    # semantic model encode the whole batch together)
+    scores = calculate_similarities_precleaned(
+        [clean_text(resume_text) for _, resume_text in resumes], jd_clean)
+
     results = []
-    for file in files:
-        if file and allowed_file(file.filename):
-            filename  = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filepath  = os.path.join(app.config['UPLOAD_FOLDER'], f"{timestamp}_{filename}")
-            file.save(filepath)
-
-            resume_text = extract_text_from_file(filepath)
-            if resume_text:
-                score       = calculate_similarity(resume_text, job_description)
-                res_skills  = extract_skills(resume_text)
-                jd_skills   = extract_skills(job_description)
-                matched     = set([s.lower() for s in res_skills]).intersection(
-                              set([s.lower() for s in jd_skills]))
-                skill_ratio = (len(matched) / max(len(jd_skills), 1)) * 100
-                final       = round((score * 0.6) + (skill_ratio * 0.4), 2)
-                results.append({
-                    'name':           file.filename,
-                    'score':          final,
-                    'matched_skills': list(matched),
-                    'skill_percent':  round(skill_ratio, 2)
-                })
+    for (name, resume_text), score in zip(resumes, scores):
+        res_skills  = extract_skills(resume_text)
+        matched     = res_skills & jd_skills   # both are lowercase frozensets
+        skill_ratio = (len(matched) / max(len(jd_skills), 1)) * 100
+        final       = round((score * 0.6) + (skill_ratio * 0.4), 2)
+        results.append({
+            'name':           name,
+            'score':          final,
+            'matched_skills': sorted(matched),
+            'skill_percent':  round(skill_ratio, 2)
+        })
 
     results.sort(key=lambda x: x['score'], reverse=True)
     for i, r in enumerate(results):
         r['rank'] = i + 1
 
-    return jsonify({'success': True, 'rankings': results})
+    return jsonify_fast({'success': True, 'rankings': results})
 
 
-@app.route('/admin')
-def admin():
-    if session.get('username') != 'admin':
-        return redirect(url_for('login'))
+ADMIN_STATS_TTL       = 30   # seconds the admin page data is reused for
+ADMIN_RECENT_ANALYSES = 20   # analyses listed on the admin page
+ADMIN_RECENT_USERS    = 100  # users listed on the admin page
+
 
+@lru_cache(maxsize=1)
+def get_admin_data(time_bucket):
+    """
+    Load everything the admin page shows, counting in SQL
+    instead of loading every row.
+
+    time_bucket changes every ADMIN_STATS_TTL seconds, so the cached
+    data is reloaded at most that often.
+    """
     conn = get_db()
     cur  = conn.cursor()
-    cur.execute('SELECT * FROM users ORDER BY created_at DESC')
+    cur.execute(
+        '''SELECT id, username, email, created_at,
+                  CASE WHEN is_admin THEN 'admin' ELSE 'user' END AS role
+           FROM users ORDER BY created_at DESC LIMIT %s''',
+        (ADMIN_RECENT_USERS,)
+    )
     users = cur.fetchall()
     cur.execute(
-        'SELECT a.*, u.username FROM analyses a JOIN users u ON a.user_id = u.id ORDER BY a.created_at DESC'
+        '''SELECT a.id, a.resume_filename, a.ats_score, a.created_at, u.username
+           FROM analyses a JOIN users u ON a.user_id = u.id
+           ORDER BY a.created_at DESC LIMIT %s''',
+        (ADMIN_RECENT_ANALYSES,)
     )
     analyses = cur.fetchall()
-    cur.close(); conn.close()
+    cur.execute('SELECT COUNT(*) AS total FROM users')
+    total_users = cur.fetchone()['total']
+    cur.execute('SELECT COUNT(*) AS total, AVG(ats_score) AS avg_score FROM analyses')
+    row = cur.fetchone()
+    cur.close(); close_db(conn)
 
-    total_users    = len(users)
-    total_analyses = len(analyses)
-    avg_score      = round(sum(a['ats_score'] for a in analyses) / len(analyses), 1) if analyses else 0
+    avg_score = round(row['avg_score'], 1) if row['avg_score'] is not None else 0
+    return {'users': users, 'analyses': analyses,
+            'total_users': total_users, 'total_analyses': row['total'],
+            'avg_score': avg_score}
+
+
+@app.route('/admin')
+def admin():
+    # is_admin comes from the users table at login — a username
+    # check would let anyone who signs up as "admin" in
+    if not session.get('is_admin'):
+        return redirect(url_for('login'))
 
-    return render_template('admin.html', users=users, analyses=analyses,
-                           total_users=total_users, total_analyses=total_analyses,
-                           avg_score=avg_score)
+    return render_template('admin.html', **get_admin_data(int(time.time() // ADMIN_STATS_TTL)))
 
 
 @app.route('/api/download-report/<int:analysis_id>')
@@ -405,16 +685,25 @@ def download_report(analysis_id):
 
     conn = get_db()
     cur  = conn.cursor()
-    cur.execute('SELECT * FROM analyses WHERE id = %s AND user_id = %s',
-                (analysis_id, session['user_id']))
+    cur.execute(
+        '''SELECT id, resume_filename, ats_score, matched_skills, missing_skills, created_at
+           FROM analyses WHERE id = %s AND user_id = %s''',
+        (analysis_id, session['user_id'])
+    )
     analysis = cur.fetchone()
-    cur.close(); conn.close()
+    cur.close(); close_db(conn)
 
     if not analysis:
         return 'Analysis not found', 404
 
-    pdf_path = generate_pdf_report(analysis, session['username'])
-    return send_file(pdf_path, as_attachment=True,
+    # A report is built once and then reused (its name changes if anything
+    # printed in it does). If another request is building it right now,
+    # generate_pdf_report waits for that build instead of starting another.
+    pdf_path = report_filepath(analysis, session['username'])
+    if not os.path.exists(pdf_path):
+        pdf_path = generate_pdf_report(analysis, session['username'], pdf_path)
+
+    return send_file(pdf_path, as_attachment=True, conditional=True, max_age=3600,
                      download_name=f'resume_report_{analysis_id}.pdf')
 
 
@@ -424,14 +713,18 @@ def get_history():
         return jsonify({'error': 'Not logged in'}), 401
 
     conn = get_db()
-    cur  = conn.cursor()
+    cur  = json_as_text(conn.cursor())
     cur.execute(
-        'SELECT * FROM analyses WHERE user_id = %s ORDER BY created_at DESC',
+        '''SELECT id, resume_filename, ats_score, created_at, matched_skills, missing_skills
+           FROM analyses WHERE user_id = %s ORDER BY created_at DESC''',
         (session['user_id'],)
     )
     analyses = cur.fetchall()
-    cur.close(); conn.close()
+    cur.close(); close_db(conn)
 
+    # The JSONB skill columns come back as JSON text (json_as_text), so
+    # orjson.Fragment copies them into the response as-is instead of
+    # parsing and re-encoding them
     results = []
     for a in analyses:
         results.append({
@@ -439,52 +732,68 @@ def get_history():
             'resume_filename': a['resume_filename'],
             'ats_score':       a['ats_score'],
             'created_at':      a['created_at'],
-            'matched_skills':  json.loads(a['matched_skills']) if a['matched_skills'] else [],
-            'missing_skills':  json.loads(a['missing_skills']) if a['missing_skills'] else []
+            'matched_skills':  orjson.Fragment(a['matched_skills']) if a['matched_skills'] else [],
+            'missing_skills':  orjson.Fragment(a['missing_skills']) if a['missing_skills'] else []
         })
 
-    return jsonify({'success': True, 'history': results})
+    return jsonify_fast({'success': True, 'history': results})
 
 
 # ============================================================
 # CAREER & TIPS HELPERS
 # ============================================================
 
-def get_career_suggestions(matched_skills, missing_skills):
-    all_skills = set(matched_skills + missing_skills)
-    careers = []
-
-    if any(s in all_skills for s in ['python', 'machine learning', 'tensorflow', 'pytorch', 'data science']):
-        careers.append({'title': '🤖 Machine Learning Engineer', 'match': 'High',
-            'description': 'Build AI/ML models for real-world applications',
-            'next_steps': 'Learn Deep Learning, Computer Vision, NLP'})
-
-    if any(s in all_skills for s in ['sql', 'pandas', 'numpy', 'tableau', 'power bi', 'statistics']):
-        careers.append({'title': '📊 Data Analyst / Data Scientist', 'match': 'High',
-            'description': 'Analyze data and create business insights',
-            'next_steps': 'Learn Advanced Statistics, A/B Testing, Storytelling'})
+# Skills that point towards each career path
+ML_SKILLS     = frozenset({'python', 'machine learning', 'tensorflow', 'pytorch', 'data science'})
+DATA_SKILLS   = frozenset({'sql', 'pandas', 'numpy', 'tableau', 'power bi', 'statistics'})
+WEB_SKILLS    = frozenset({'javascript', 'react', 'html', 'css', 'node'})
+DEVOPS_SKILLS = frozenset({'aws', 'docker', 'kubernetes', 'devops', 'linux'})
+NLP_SKILLS    = frozenset({'nlp', 'bert', 'transformers', 'llm', 'gpt'})
+
+ML_CAREER = {'title': '🤖 Machine Learning Engineer', 'match': 'High',
+    'description': 'Build AI/ML models for real-world applications',
+    'next_steps': 'Learn Deep Learning, Computer Vision, NLP'}
+DATA_CAREER = {'title': '📊 Data Analyst / Data Scientist', 'match': 'High',
+    'description': 'Analyze data and create business insights',
+    'next_steps': 'Learn Advanced Statistics, A/B Testing, Storytelling'}
+WEB_CAREER = {'title': '🌐 Full Stack Web Developer', 'match': 'High',
+    'description': 'Build complete web applications',
+    'next_steps': 'Learn TypeScript, Cloud Deployment, Docker'}
+DEVOPS_CAREER = {'title': '☁️ DevOps / Cloud Engineer', 'match': 'Medium',
+    'description': 'Manage cloud infrastructure and CI/CD pipelines',
+    'next_steps': 'Get AWS/Azure certifications'}
+NLP_CAREER = {'title': '🧠 NLP / AI Research Engineer', 'match': 'High',
+    'description': 'Work on language models and AI research',
+    'next_steps': 'Read research papers, contribute to Hugging Face'}
+DEFAULT_CAREER = {'title': '💻 Software Developer', 'match': 'Medium',
+    'description': 'Build software applications across various domains',
+    'next_steps': 'Strengthen core programming skills and pick a specialization'}
+
+# Each career path with the skills that point to it, in the order they're suggested
+CAREER_PATHS = [
+    (ML_SKILLS,     ML_CAREER),
+    (DATA_SKILLS,   DATA_CAREER),
+    (WEB_SKILLS,    WEB_CAREER),
+    (DEVOPS_SKILLS, DEVOPS_CAREER),
+    (NLP_SKILLS,    NLP_CAREER),
+]
+MAX_CAREER_SUGGESTIONS = 3
 
-    if any(s in all_skills for s in ['javascript', 'react', 'html', 'css', 'node']):
-        careers.append({'title': '🌐 Full Stack Web Developer', 'match': 'High',
-            'description': 'Build complete web applications',
-            'next_steps': 'Learn TypeScript, Cloud Deployment, Docker'})
 
-    if any(s in all_skills for s in ['aws', 'docker', 'kubernetes', 'devops', 'linux']):
-        careers.append({'title': '☁️ DevOps / Cloud Engineer', 'match': 'Medium',
-            'description': 'Manage cloud infrastructure and CI/CD pipelines',
-            'next_steps': 'Get AWS/Azure certifications'})
+def get_career_suggestions(matched_skills, missing_skills):
+    all_skills = frozenset(matched_skills).union(missing_skills)
+    careers = []
 
-    if any(s in all_skills for s in ['nlp', 'bert', 'transformers', 'llm', 'gpt']):
-        careers.append({'title': '🧠 NLP / AI Research Engineer', 'match': 'High',
-            'description': 'Work on language models and AI research',
-            'next_steps': 'Read research papers, contribute to Hugging Face'})
+    for career_skills, career in CAREER_PATHS:
+        if not career_skills.isdisjoint(all_skills):
+            careers.append(career)
+            if len(careers) == MAX_CAREER_SUGGESTIONS:
+                break
 
     if not careers:
-        careers.append({'title': '💻 Software Developer', 'match': 'Medium',
-            'description': 'Build software applications across various domains',
-            'next_steps': 'Strengthen core programming skills and pick a specialization'})
+        careers.append(DEFAULT_CAREER)
 
-    return careers[:3]
+    return careers
 
 
 def get_resume_tips(score, missing_skills):
@@ -519,5 +828,4 @@ def get_resume_tips(score, missing_skills):
 # ============================================================
 
 if __name__ == '__main__':
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
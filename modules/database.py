@@ -1,17 +1,89 @@
 # modules/database.py — Updated with email verification columns
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
+import psycopg2.pool
 import os
+import threading
+from flask import g, has_app_context
+from werkzeug.security import generate_password_hash
 
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
+# The analyses JSON columns are JSONB, which psycopg2 normally parses into
+# lists. Cursors passed to json_as_text() get the JSON text as-is instead:
+# /api/history sends it straight to the browser without parsing it.
+JSONB_AS_TEXT = psycopg2.extensions.new_type((3802,), 'JSONB_AS_TEXT', lambda value, cur: value)
+
+def json_as_text(cur):
+    """Make this one cursor return JSONB columns as JSON text."""
+    psycopg2.extensions.register_type(JSONB_AS_TEXT, cur)
+    return cur
+
+# analyses columns that hold JSON lists
+JSON_COLUMNS = ('matched_skills', 'missing_skills', 'career_suggestions', 'resume_tips')
+DB_POOL_MIN  = int(os.environ.get('DB_POOL_MIN', 2))   # idle connections kept open
+DB_POOL_MAX  = int(os.environ.get('DB_POOL_MAX', 10))  # connections in use at once
+
+# Connections are kept open and reused, because opening a new one
+# (TCP + TLS + login) costs tens of milliseconds on every request.
+# The pool belongs to one process: a forked worker builds its own.
+connection_pool = None
+pool_pid        = None
+pool_lock       = threading.Lock()
+
+def get_pool():
+    global connection_pool, pool_pid
+    if pool_pid != os.getpid():
+        with pool_lock:
+            if pool_pid != os.getpid():
+                connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                    DB_POOL_MIN, DB_POOL_MAX, DATABASE_URL,
+                    cursor_factory=psycopg2.extras.RealDictCursor
+                )
+                pool_pid = os.getpid()
+    return connection_pool
+
 def get_db():
-    conn = psycopg2.connect(DATABASE_URL, cursor_factory=psycopg2.extras.RealDictCursor)
+    try:
+        conn = get_pool().getconn()
+    except psycopg2.pool.PoolError:
+        # Every pooled connection is busy — use a one-off connection
+        conn = psycopg2.connect(DATABASE_URL, cursor_factory=psycopg2.extras.RealDictCursor)
+    # Remember connections taken during a request, so release_db_connections()
+    # can give them back if the route crashes before calling close_db()
+    if has_app_context():
+        g.setdefault('db_connections', []).append(conn)
     return conn
 
 def close_db(conn):
+    """Give a connection from get_db() back to the pool."""
     if conn:
-        conn.close()
+        if has_app_context() and conn in g.get('db_connections', []):
+            g.db_connections.remove(conn)
+        try:
+            get_pool().putconn(conn)
+        except psycopg2.pool.PoolError:
+            # It was a one-off connection, not one of the pool's
+            conn.close()
+
+def close_pool():
+    """
+    Close every pooled connection; the next get_db() opens a new pool.
+    Called after startup work in a process that will fork (gunicorn
+    --preload), so the workers don't inherit its open connections.
+    """
+    global connection_pool, pool_pid
+    with pool_lock:
+        if connection_pool is not None and pool_pid == os.getpid():
+            connection_pool.closeall()
+        connection_pool = None
+        pool_pid        = None
+
+def release_db_connections(error=None):
+    """Runs after every request: returns any connection a route left behind."""
+    for conn in g.pop('db_connections', []):
+        close_db(conn)
 
 def init_db():
     conn = get_db()
@@ -37,10 +109,10 @@ def init_db():
             user_id          INTEGER REFERENCES users(id),
             resume_filename  VARCHAR(300),
             ats_score        FLOAT,
-            matched_skills   TEXT,
-            missing_skills   TEXT,
-            career_suggestions TEXT,
-            resume_tips      TEXT,
+            matched_skills   JSONB,
+            missing_skills   JSONB,
+            career_suggestions JSONB,
+            resume_tips      JSONB,
             job_description  TEXT,
             created_at       VARCHAR(50)
         )
@@ -57,13 +129,43 @@ def init_db():
         except Exception:
             pass
 
+    # Older databases stored the JSON columns as TEXT — convert them once
+    cur.execute(
+        '''SELECT column_name FROM information_schema.columns
+           WHERE table_name = 'analyses' AND data_type = 'text'
+             AND column_name = ANY(%s)''',
+        (list(JSON_COLUMNS),)
+    )
+    for row in cur.fetchall():
+        col = row['column_name']
+        cur.execute(f"ALTER TABLE analyses ALTER COLUMN {col} TYPE JSONB USING NULLIF({col}, '')::jsonb")
+
+    # Dashboard and history look up one user's analyses, newest first
+    cur.execute('''
+        CREATE INDEX IF NOT EXISTS idx_analyses_user_created
+        ON analyses (user_id, created_at DESC)
+    ''')
+
+    # The admin page lists the newest analyses of all users
+    cur.execute('''
+        CREATE INDEX IF NOT EXISTS idx_analyses_created
+        ON analyses (created_at DESC)
+    ''')
+
+    # Email verification links look the user up by token
+    # (users.email needs no index of its own: UNIQUE already creates one)
+    cur.execute('''
+        CREATE INDEX IF NOT EXISTS idx_users_verify_token
+        ON users (verify_token)
+    ''')
+
     # Create default admin (already verified)
     cur.execute('SELECT id FROM users WHERE email = %s', ('24x51a3284@srecnandyal.edu.in',))
     if not cur.fetchone():
         cur.execute(
             '''INSERT INTO users (username, email, password, is_admin, is_verified, created_at)
                VALUES (%s, %s, %s, %s, %s, %s)''',
-            ('admin', '24x51a3284@srecnandyal.edu.in', 'Naik@2007', True, True,
+            ('admin', '24x51a3284@srecnandyal.edu.in', generate_password_hash('Naik@2007'), True, True,
              __import__('datetime').datetime.now().isoformat())
         )
     else:
@@ -75,5 +177,5 @@ def init_db():
 
     conn.commit()
     cur.close()
-    conn.close()
+    close_db(conn)
     print("✅ Database initialized with email verification support")
\ No newline at end of file
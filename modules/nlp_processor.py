@@ -9,40 +9,123 @@
 # PyPDF2 reads text from PDF files
 import PyPDF2
 
+# pypdfium2 (Google's PDFium engine, written in C++) reads PDFs much
+# faster than PyPDF2. If it isn't installed we fall back to PyPDF2.
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
 # python-docx reads text from DOCX files
 import docx
 
 # re = regular expressions, for finding patterns in text
 import re
 
-# os for file operations
+# os for file operations, io to treat bytes like a file
 import os
+import io
+
+# pyahocorasick finds many words in a text in a single pass.
+# If it isn't installed, extract_skills uses one big regex instead.
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# lru_cache remembers a function's result so we only compute it once
+from functools import lru_cache
+
+# For remembering the text of files we've already read, by their content
+import hashlib
+import threading
+from collections import OrderedDict, Counter
 
 # NLTK = Natural Language Toolkit (NLP library)
+# Its data files are only loaded when a function first needs them
 import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 
-# Sklearn for TF-IDF and cosine similarity
+# math.log for the IDF weights
+import math
+
+# numpy ranks the terms when there are too many to keep
+import numpy as np
+
+# Sklearn splits text into words and phrases
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
-# Download required NLTK data (only needed once)
-# These are datasets that NLTK uses
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
+# ============================================================
+# CACHED NLP RESOURCES
+# Loaded once per worker process and reused by every request
+# ============================================================
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords', quiet=True)
+@lru_cache(maxsize=None)
+def ensure_nltk_data(path, package):
+    """
+    Download an NLTK dataset if it isn't installed yet (only needed once).
+    path    = where NLTK looks for it, e.g. 'corpora/stopwords'
+    package = the name to download, e.g. 'stopwords'
+    """
+    try:
+        nltk.data.find(path)
+    except LookupError:
+        nltk.download(package, quiet=True)
 
-try:
-    nltk.download('punkt_tab', quiet=True)
-except:
-    pass
+
+@lru_cache(maxsize=1)
+def get_stopwords():
+    """
+    Return the English stopwords as a frozenset.
+
+    NLTK re-reads the corpus file on every stopwords.words() call,
+    so we load it once and keep it in memory.
+    """
+    from nltk.corpus import stopwords
+    ensure_nltk_data('corpora/stopwords', 'stopwords')
+    return frozenset(stopwords.words('english'))
+
+
+# Words that are everywhere in resumes but say nothing about the candidate
+RESUME_STOPWORDS = frozenset({'experience', 'work', 'using', 'use', 'years', 'year',
+                              'strong', 'good', 'knowledge', 'ability', 'skills'})
+
+# Used when the NLTK stopwords can't be loaded (only words longer than
+# 3 letters matter, since get_keyword_frequencies skips shorter ones)
+BASIC_STOPWORDS = frozenset({'about', 'above', 'after', 'again', 'also', 'been', 'before',
+                             'being', 'below', 'between', 'both', 'does', 'doing', 'down',
+                             'during', 'each', 'from', 'further', 'have', 'having', 'here',
+                             'into', 'more', 'most', 'once', 'only', 'other', 'over', 'same',
+                             'should', 'some', 'such', 'than', 'that', 'their', 'them',
+                             'then', 'there', 'these', 'they', 'this', 'those', 'through',
+                             'under', 'until', 'very', 'were', 'what', 'when', 'where',
+                             'which', 'while', 'will', 'with', 'would', 'your'})
+
+
+@lru_cache(maxsize=1)
+def get_keyword_stopwords():
+    """
+    Words get_keyword_frequencies() ignores: the English stopwords
+    plus RESUME_STOPWORDS, built once instead of on every call.
+    """
+    try:
+        return get_stopwords() | RESUME_STOPWORDS
+    except LookupError:
+        return BASIC_STOPWORDS | RESUME_STOPWORDS
+
+
+def load_nlp_resources():
+    """
+    Load the cached NLP data ahead of time.
+
+    app.py calls this at startup so the first request doesn't pay for it.
+    With `gunicorn --preload` it runs once in the master process and every
+    worker shares the loaded data.
+    """
+    try:
+        get_stopwords()
+    except LookupError:
+        print("⚠️ NLTK stopwords not found — run: python -c \"import nltk; nltk.download('stopwords')\"")
+    get_keyword_stopwords()
 
 
 # ============================================================
@@ -51,7 +134,7 @@ except:
 # in resumes and job descriptions
 # ============================================================
 
-TECH_SKILLS = {
+TECH_SKILLS = frozenset({
     # Programming Languages
     'python', 'java', 'javascript', 'c++', 'c#', 'c', 'ruby', 'php', 'swift',
     'kotlin', 'go', 'rust', 'scala', 'r', 'matlab', 'perl', 'typescript',
@@ -104,46 +187,201 @@ TECH_SKILLS = {
     'api', 'json', 'xml', 'microservices', 'oop', 'object oriented',
     'data structures', 'algorithms', 'design patterns', 'unit testing',
     'test driven', 'tdd', 'version control', 'agile', 'scrum'
+})
+
+# Compile one word-boundary pattern per skill when the module loads,
+# so extract_skills() doesn't rebuild ~200 regexes on every call.
+# e.g., "python" should not match "pythonic"
+SKILL_PATTERNS = [
+    (skill, re.compile(r'\b' + re.escape(skill) + r'\b'))
+    for skill in TECH_SKILLS
+]
+
+def build_trie_regex(words):
+    """
+    Turn a list of words into one regex that shares common prefixes.
+
+    e.g., ['react', 'react native', 'redis'] -> 're(?:act(?:\\ native)?|dis)'
+
+    Python's regex engine tries alternatives one by one, so a flat
+    'a|b|c|...' of 200 skills is attempted 200 times at every position.
+    Shaped like a tree (trie), only the branch matching the next letter is
+    followed, so the work per position no longer grows with the number of
+    skills. Longer matches are tried first, and shorter ones on backtrack.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # a word ends here
+
+    def node_to_regex(node):
+        branches = [re.escape(char) + node_to_regex(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        # If a word can also end here, the longer branches are optional
+        return group + '?' if '' in node else group
+
+    return node_to_regex(trie)
+
+
+# All skills compiled into one trie-shaped pattern, so a document is
+# scanned once instead of once per skill. The longest skill wins at each
+# position (e.g., "react native" over "react"), and the lookahead (?=...)
+# lets matches overlap, e.g. "rest api" and "api".
+SKILL_PATTERN = re.compile(r'(?=\b(' + build_trie_regex(TECH_SKILLS) + r')\b)')
+
+# Only the longest skill at each position is returned by SKILL_PATTERN,
+# so remember which shorter skills each skill contains
+# (e.g., "react native" -> "react", "rest api" -> "api").
+SKILLS_INSIDE = {
+    skill: frozenset([skill] + [other for other, pattern in SKILL_PATTERNS
+                                if pattern.search(skill)])
+    for skill in TECH_SKILLS
 }
 
+# With pyahocorasick: an automaton that reports every skill (overlaps
+# included) in one linear pass, however many skills the list grows to
+if ahocorasick is not None:
+    SKILL_AUTOMATON = ahocorasick.Automaton()
+    for skill in TECH_SKILLS:
+        SKILL_AUTOMATON.add_word(skill, skill)
+    SKILL_AUTOMATON.make_automaton()
+else:
+    SKILL_AUTOMATON = None
+
+
+def is_word_char(char):
+    """True for letters, digits and '_' (what \\w matches in a regex)."""
+    return char.isalnum() or char == '_'
+
+
+def find_skills_with_automaton(text_lower):
+    """
+    Skills in the text according to SKILL_AUTOMATON.
+
+    The automaton also finds skills inside other words ("go" in "good"),
+    so each hit is kept only if it has a word boundary on both sides —
+    the same rule as \\b in the regex version.
+    """
+    found_skills = set()
+    for end, skill in SKILL_AUTOMATON.iter(text_lower):
+        start  = end - len(skill) + 1
+        before = text_lower[start - 1] if start > 0 else ''
+        after  = text_lower[end + 1] if end + 1 < len(text_lower) else ''
+        if (is_word_char(before) != is_word_char(skill[0]) and
+                is_word_char(skill[-1]) != is_word_char(after)):
+            found_skills.add(skill)
+    return found_skills
+
 
 # ============================================================
 # FUNCTION 1: Extract text from uploaded file
 # ============================================================
 
-def extract_text_from_file(filepath):
+def extract_text_from_file(source, filename=None):
     """
     Read a PDF or DOCX file and return all the text inside it.
 
-    filepath = the path to the file on the server
+    source   = the path to the file on the server, or an open file
+               object (like an upload's stream) so we skip the disk
+    filename = the original file name, needed when source is a file object
     Returns a string of all the text.
     """
     # Get the file extension (.pdf or .docx)
-    ext = os.path.splitext(filepath)[1].lower()
+    ext = os.path.splitext(filename or source)[1].lower()
 
     if ext == '.pdf':
-        return extract_text_from_pdf(filepath)
+        return extract_text_from_pdf(source)
     elif ext in ['.docx', '.doc']:
-        return extract_text_from_docx(filepath)
+        return extract_text_from_docx(source)
     else:
         return ""
 
 
-def extract_text_from_pdf(filepath):
-    """Read all text from a PDF file"""
-    text = ""
+def extract_text_from_bytes(data, filename):
+    """
+    Same as extract_text_from_file(), for a file's raw bytes.
+
+    Bytes can be sent to another process (an open file can't), which is
+    how rank_resumes reads several resumes at once.
+    """
+    return extract_text_from_file(io.BytesIO(data), filename)
+
+
+# ------------------------------------------------------------
+# Text of recently read files, so the same resume uploaded again
+# (a retry, or the same file in another ranking) isn't parsed twice.
+# Keyed by a hash of the file's bytes, so the files themselves
+# aren't kept in memory — only their text.
+# ------------------------------------------------------------
+
+EXTRACTED_TEXT_CACHE_SIZE = 64
+extracted_text_cache      = OrderedDict()
+extracted_text_lock       = threading.Lock()
+
+
+def file_content_key(data, filename):
+    """
+    Cache key for a file: a BLAKE2 hash of its bytes plus its
+    extension (the same bytes named .pdf and .docx are read differently).
+    """
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    return digest, os.path.splitext(filename)[1].lower()
+
+
+def get_cached_text(key):
+    """Text previously stored for this key, or None."""
+    with extracted_text_lock:
+        text = extracted_text_cache.get(key)
+        if text is not None:
+            extracted_text_cache.move_to_end(key)  # recently used
+        return text
+
+
+def remember_text(key, text):
+    """Store a file's text, dropping the least recently used entry if full."""
+    with extracted_text_lock:
+        extracted_text_cache[key] = text
+        extracted_text_cache.move_to_end(key)
+        if len(extracted_text_cache) > EXTRACTED_TEXT_CACHE_SIZE:
+            extracted_text_cache.popitem(last=False)
+
+
+def extract_text_cached(data, filename):
+    """extract_text_from_bytes(), skipped when the same file was read before."""
+    key  = file_content_key(data, filename)
+    text = get_cached_text(key)
+    if text is None:
+        text = extract_text_from_bytes(data, filename)
+        remember_text(key, text)
+    return text
+
+
+def extract_text_from_pdf(source):
+    """Read all text from a PDF file (path or binary file object)"""
+    if pdfium is not None:
+        text = extract_text_with_pdfium(source)
+        if text is not None:
+            return text
+        # PDFium couldn't open it — let PyPDF2 have a go
+        if hasattr(source, 'seek'):
+            source.seek(0)
+
     try:
-        # Open the PDF file in binary read mode ('rb')
-        with open(filepath, 'rb') as file:
-            # Create a PDF reader object
-            pdf_reader = PyPDF2.PdfReader(file)
-
-            # Loop through every page and extract text
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                page_text = page.extract_text()
-                if page_text:  # Only add if there's actual text
-                    text += page_text + "\n"
+        # Create a PDF reader object
+        # PdfReader opens paths itself and also reads file objects directly
+        pdf_reader = PyPDF2.PdfReader(source)
+
+        # Extract every page's text, skipping pages without any,
+        # then join them once at the end
+        pages = [page.extract_text() for page in pdf_reader.pages]
+        text = "\n".join(page_text for page_text in pages if page_text)
 
     except Exception as e:
         print(f"Error reading PDF: {e}")
@@ -152,24 +390,54 @@ def extract_text_from_pdf(filepath):
     return text.strip()  # Remove extra whitespace
 
 
-def extract_text_from_docx(filepath):
-    """Read all text from a DOCX file"""
-    text = ""
+# PDFium is not thread-safe, so only one thread may use it at a time.
+# Requests are served on several threads (threaded dev server, gunicorn
+# gthread workers); two PDFs read at once could crash the process.
+pdfium_lock = threading.Lock()
+
+
+def extract_text_with_pdfium(source):
+    """
+    Read all text from a PDF with pypdfium2 (path or binary file object).
+    Returns None if the file couldn't be read.
+    """
+    with pdfium_lock:
+        pdf = None
+        try:
+            pdf = pdfium.PdfDocument(source)
+            pages = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                pages.append(textpage.get_text_range())
+                # PDFium memory isn't managed by Python, so free it right away
+                textpage.close()
+                page.close()
+            return "\n".join(page_text for page_text in pages if page_text).strip()
+
+        except Exception as e:
+            print(f"Error reading PDF with pypdfium2: {e}")
+            return None
+
+        finally:
+            if pdf is not None:
+                pdf.close()
+
+
+def extract_text_from_docx(source):
+    """Read all text from a DOCX file (path or binary file object)"""
     try:
         # Open the DOCX document
-        doc = docx.Document(filepath)
+        doc = docx.Document(source)
 
-        # Loop through all paragraphs and add their text
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():  # Skip empty paragraphs
-                text += paragraph.text + "\n"
+        # All paragraphs, skipping empty ones
+        lines = [paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()]
 
         # Also check tables inside the DOCX
         for table in doc.tables:
             for row in table.rows:
-                for cell in row.cells:
-                    if cell.text.strip():
-                        text += cell.text + "\n"
+                lines.extend(cell.text for cell in row.cells if cell.text.strip())
+
+        text = "\n".join(lines)
 
     except Exception as e:
         print(f"Error reading DOCX: {e}")
@@ -182,36 +450,56 @@ def extract_text_from_docx(filepath):
 # FUNCTION 2: Extract skills from text
 # ============================================================
 
+@lru_cache(maxsize=256)
 def extract_skills(text):
     """
     Find all tech skills mentioned in a piece of text.
 
+    Results are cached, so scanning the same text again (one job
+    description against many resumes, or a resume uploaded twice)
+    costs nothing.
+
     text = a string (resume text or job description)
-    Returns a list of skills found.
+    Returns a frozenset of the skills found, all in lowercase
+    (it is shared between calls, so it must not be changed).
     """
     if not text:
-        return []
+        return frozenset()
 
     # Convert text to lowercase for comparison
     text_lower = text.lower()
 
+    if SKILL_AUTOMATON is not None:
+        return frozenset(find_skills_with_automaton(text_lower))
+
     found_skills = set()  # Use a set to avoid duplicates
 
-    # Check each skill in our database
-    for skill in TECH_SKILLS:
-        # Use word boundary matching to find exact skills
-        # e.g., "python" should not match "pythonic"
-        pattern = r'\b' + re.escape(skill) + r'\b'
-        if re.search(pattern, text_lower):
-            found_skills.add(skill)
+    # One pass over the text finds every skill from our database
+    for skill in SKILL_PATTERN.findall(text_lower):
+        found_skills.update(SKILLS_INSIDE[skill])
 
-    return list(found_skills)
+    return frozenset(found_skills)
 
 
 # ============================================================
 # FUNCTION 3: Calculate TF-IDF Cosine Similarity
 # ============================================================
 
+# Splits text into words and 2-word phrases, exactly like TfidfVectorizer.
+# It needs no fitting, so it's built once and reused.
+# stop_words='english' removes common words like 'the', 'and', 'is'
+WORD_SPLITTER = TfidfVectorizer(
+    stop_words='english',    # Remove stopwords
+    ngram_range=(1, 2)       # Consider 1 and 2 word phrases
+).build_analyzer()
+
+# Use only the top 1000 terms (most frequent across both texts)
+MAX_FEATURES = 1000
+
+# IDF weight of a term that appears in only one of the two texts
+# (sklearn's smooth IDF: ln((1 + 2) / (1 + 1)) + 1)
+UNIQUE_TERM_IDF = math.log(1.5) + 1
+
 def calculate_similarity(resume_text, job_description):
     """
     Calculate how similar the resume is to the job description.
@@ -230,38 +518,134 @@ def calculate_similarity(resume_text, job_description):
 
     # Clean the texts
     resume_clean = clean_text(resume_text)
-    jd_clean     = clean_text(job_description)
+    jd_clean     = clean_job_description(job_description)
+
+    return calculate_similarity_precleaned(resume_clean, jd_clean)
 
+
+def calculate_similarity_precleaned(resume_clean, jd_clean):
+    """
+    Same as calculate_similarity(), but for texts that already went
+    through clean_text(). This lets rank_resumes clean the job
+    description once for the whole batch.
+
+    Returns a score from 0 to 100.
+    """
     try:
-        # Create TF-IDF Vectorizer
-        # stop_words='english' removes common words like 'the', 'and', 'is'
-        # These don't carry meaning and would skew the score
-        vectorizer = TfidfVectorizer(
-            stop_words='english',    # Remove stopwords
-            ngram_range=(1, 2),      # Consider 1 and 2 word phrases
-            min_df=1,                # Minimum document frequency
-            max_features=1000        # Use top 1000 features
-        )
-
-        # Fit and transform: convert texts to TF-IDF vectors (numbers)
-        # We pass both texts together so vectorizer knows all words
-        tfidf_matrix = vectorizer.fit_transform([resume_clean, jd_clean])
-
-        # Calculate cosine similarity between the two vectors
-        # tfidf_matrix[0] = resume vector, tfidf_matrix[1] = JD vector
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])
-
-        # similarity is a 2D array like [[0.75]]
-        # We extract the number and convert to 0-100 scale
-        score = float(similarity[0][0]) * 100
-
-        return round(score, 2)
+        # Count every word and 2-word phrase in both texts
+        resume_counts = Counter(WORD_SPLITTER(resume_clean))
+        jd_counts     = Counter(WORD_SPLITTER(jd_clean))
+
+        # Keep only the top MAX_FEATURES terms, picked the same way
+        # TfidfVectorizer(max_features=1000) picks them
+        if len(resume_counts | jd_counts) > MAX_FEATURES:
+            kept = top_terms(resume_counts, jd_counts)
+            resume_counts = Counter({term: n for term, n in resume_counts.items() if term in kept})
+            jd_counts     = Counter({term: n for term, n in jd_counts.items() if term in kept})
+
+        # IDF with only two documents is simple: a term found in both
+        # texts has weight 1, a term found in just one has weight
+        # UNIQUE_TERM_IDF. That's exactly what TfidfVectorizer computes,
+        # without building a vocabulary and matrix on every call.
+        # Terms only in one text add nothing to the dot product, so
+        # the dot product is just the plain counts of shared terms.
+        shared = resume_counts.keys() & jd_counts.keys()
+        dot    = sum(resume_counts[term] * jd_counts[term] for term in shared)
+        if dot == 0:
+            return 0.0
+
+        resume_norm = vector_length(resume_counts, shared)
+        jd_norm     = vector_length(jd_counts, shared)
+
+        # Cosine similarity = dot product / (length * length)
+        # Score of 1.0 = identical, converted to a 0-100 scale
+        score = dot / (resume_norm * jd_norm) * 100
+
+        return round(float(score), 2)
 
     except Exception as e:
         print(f"Error calculating similarity: {e}")
         return 0.0
 
 
+def top_terms(resume_counts, jd_counts):
+    """
+    The MAX_FEATURES terms with the highest combined count.
+    Terms are sorted alphabetically first and ranked with numpy's
+    argsort, like sklearn does, so ties are broken the same way.
+    """
+    terms  = sorted(resume_counts.keys() | jd_counts.keys())
+    totals = np.array([resume_counts[term] + jd_counts[term] for term in terms], dtype=np.int64)
+    return {terms[i] for i in (-totals).argsort()[:MAX_FEATURES]}
+
+
+def vector_length(counts, shared):
+    """
+    Length (L2 norm) of a TF-IDF vector, from its raw counts.
+    counts = Counter of term -> count
+    shared = terms that also appear in the other text
+    """
+    total = 0.0
+    for term, n in counts.items():
+        weight = 1 if term in shared else UNIQUE_TERM_IDF
+        total += (n * weight) ** 2
+    return math.sqrt(total)
+
+
+# ------------------------------------------------------------
+# Optional: semantic ranking with Sentence-BERT
+# Understands meaning ("ML engineer" ~ "machine learning developer"),
+# but needs the large sentence-transformers/torch install, so it's
+# only used when USE_SEMANTIC_RANKING is turned on.
+# ------------------------------------------------------------
+
+USE_SEMANTIC_RANKING = os.environ.get('USE_SEMANTIC_RANKING', '').lower() in ('1', 'true', 'yes')
+SEMANTIC_MODEL_NAME  = os.environ.get('SEMANTIC_MODEL_NAME', 'all-MiniLM-L6-v2')
+
+
+@lru_cache(maxsize=1)
+def get_semantic_model():
+    """Load the Sentence-BERT model once. Returns None if it isn't available."""
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(SEMANTIC_MODEL_NAME)
+    except Exception as e:
+        print(f"⚠️ Semantic ranking unavailable, using TF-IDF: {e}")
+        return None
+
+
+def calculate_similarities_precleaned(resume_cleans, jd_clean):
+    """
+    Score many cleaned resumes against one cleaned job description.
+
+    With semantic ranking on, all texts go through the model in one
+    batch and the scores come from a single matrix multiply.
+    Otherwise each resume is scored with calculate_similarity_precleaned().
+
+    Returns a list of scores from 0 to 100, in the same order.
+    """
+    model = get_semantic_model() if USE_SEMANTIC_RANKING and resume_cleans else None
+    if model is None:
+        return [calculate_similarity_precleaned(resume_clean, jd_clean)
+                for resume_clean in resume_cleans]
+
+    # normalize_embeddings=True gives every vector length 1,
+    # so each cosine similarity is just a dot product
+    embeddings = model.encode([jd_clean] + list(resume_cleans),
+                              batch_size=16, normalize_embeddings=True,
+                              convert_to_numpy=True)
+    scores = embeddings[1:] @ embeddings[0]
+    return [round(max(float(score), 0.0) * 100, 2) for score in scores]
+
+
+# Patterns used by clean_text(), compiled once instead of on every call
+URL_PATTERN        = re.compile(r'http\S+|www\S+')
+EMAIL_PATTERN      = re.compile(r'\S+@\S+')
+PHONE_PATTERN      = re.compile(r'[\+\d]?(\d{2,3}[-\.\s]??\d{2,3}[-\.\s]??\d{4}|\(\d{3}\)\s*\d{3}[-\.\s]??\d{4})')
+SPECIAL_PATTERN    = re.compile(r'[^\w\s]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
 def clean_text(text):
     """
     Clean text for better analysis:
@@ -269,31 +653,54 @@ def clean_text(text):
     - Convert to lowercase
     - Remove extra spaces
     """
+    # Convert to lowercase first, so the patterns below
+    # also catch upper-case links like "WWW.Site.com"
+    text = text.lower()
+
     # Remove URLs
-    text = re.sub(r'http\S+|www\S+', '', text)
+    text = URL_PATTERN.sub('', text)
 
     # Remove email addresses
-    text = re.sub(r'\S+@\S+', '', text)
+    text = EMAIL_PATTERN.sub('', text)
 
     # Remove phone numbers
-    text = re.sub(r'[\+\d]?(\d{2,3}[-\.\s]??\d{2,3}[-\.\s]??\d{4}|\(\d{3}\)\s*\d{3}[-\.\s]??\d{4})', '', text)
+    text = PHONE_PATTERN.sub('', text)
 
     # Remove special characters but keep spaces and alphanumeric
-    text = re.sub(r'[^\w\s]', ' ', text)
-
-    # Convert to lowercase
-    text = text.lower()
+    text = SPECIAL_PATTERN.sub(' ', text)
 
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = WHITESPACE_PATTERN.sub(' ', text)
 
     return text.strip()
 
 
+@lru_cache(maxsize=128)
+def clean_job_description(job_description):
+    """clean_text() for job descriptions, cached because they repeat."""
+    return clean_text(job_description)
+
+
 # ============================================================
 # FUNCTION 4: Get keyword frequencies for visualization
 # ============================================================
 
+# A "word" for the frequency chart: 4 or more letters/digits
+KEYWORD_PATTERN = re.compile(r'\w{4,}')
+
+
+def count_top_words(words, stop_words, top_n):
+    """
+    Count the words longer than 3 letters that aren't stopwords,
+    and return the top_n most common as a dict.
+    """
+    freq = Counter(word for word in words
+                   if len(word) > 3 and word not in stop_words)
+
+    # most_common() picks the top N without sorting every word
+    return dict(freq.most_common(top_n))
+
+
 def get_keyword_frequencies(text, top_n=20):
     """
     Count how many times each important word appears.
@@ -308,32 +715,12 @@ def get_keyword_frequencies(text, top_n=20):
     clean = clean_text(text)
 
     try:
-        # Get English stopwords (common words to ignore)
-        stop_words = set(stopwords.words('english'))
-        # Add our own custom stopwords
-        stop_words.update(['experience', 'work', 'using', 'use', 'years', 'year',
-                           'strong', 'good', 'knowledge', 'ability', 'skills'])
-
-        # Split text into individual words
-        words = word_tokenize(clean)
-
-        # Count frequencies, ignoring stopwords and short words
-        freq = {}
-        for word in words:
-            if word not in stop_words and len(word) > 3:
-                freq[word] = freq.get(word, 0) + 1
-
-        # Sort by frequency and return top N
-        sorted_freq = sorted(freq.items(), key=lambda x: x[1], reverse=True)
-        return dict(sorted_freq[:top_n])
+        # Split text into individual words. clean_text() left only
+        # lowercase letters/digits and spaces, so a simple pattern does it.
+        # Common words are ignored (English stopwords + our own).
+        return count_top_words(KEYWORD_PATTERN.findall(clean), get_keyword_stopwords(), top_n)
 
     except Exception as e:
         print(f"Error getting frequencies: {e}")
         # Fallback: simple word count
-        words = clean.split()
-        freq  = {}
-        for w in words:
-            if len(w) > 3:
-                freq[w] = freq.get(w, 0) + 1
-        sorted_freq = sorted(freq.items(), key=lambda x: x[1], reverse=True)
-        return dict(sorted_freq[:top_n])
+        return count_top_words(clean.split(), frozenset(), top_n)
@@ -5,156 +5,288 @@
 # ============================================================
 
 import os
-import json
-from datetime import datetime
+import io
+import hashlib
+import threading
+from xml.sax.saxutils import escape
 
-def generate_pdf_report(analysis, username):
+# orjson parses JSON several times faster than the json module
+import orjson
+
+# Try to use reportlab (pip install reportlab)
+# If it's missing, generate_pdf_report writes a plain text file instead
+try:
+    from reportlab.lib.pagesizes import letter, A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors
+    from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer,
+                                     Table, TableStyle, HRFlowable)
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT
+    REPORTLAB_OK = True
+except ImportError:
+    REPORTLAB_OK = False
+
+
+# ============================================================
+# REPORT STYLES
+# The same for every report, so they're created once
+# ============================================================
+
+if REPORTLAB_OK:
+    # Get default styles
+    STYLES = getSampleStyleSheet()
+
+    # Create custom styles
+    TITLE_STYLE = ParagraphStyle(
+        'CustomTitle',
+        parent=STYLES['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#6c63ff'),
+        alignment=TA_CENTER,
+        spaceAfter=12
+    )
+
+    HEADER_STYLE = ParagraphStyle(
+        'CustomHeader',
+        parent=STYLES['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#2d3748'),
+        spaceAfter=8
+    )
+
+    NORMAL_STYLE = ParagraphStyle(
+        'CustomNormal',
+        parent=STYLES['Normal'],
+        fontSize=11,
+        spaceAfter=6
+    )
+
+    SCORE_LABEL_STYLE = ParagraphStyle(
+        'ScoreLabel', parent=STYLES['Normal'], alignment=TA_CENTER, fontSize=12)
+
+    FOOTER_STYLE = ParagraphStyle(
+        'Footer', parent=STYLES['Normal'], alignment=TA_CENTER,
+        fontSize=9, textColor=colors.grey)
+
+    # The big ATS score number: red below 30, amber below 60, green otherwise
+    SCORE_STYLES = tuple(
+        ParagraphStyle('Score', parent=STYLES['Normal'], fontSize=40,
+                       textColor=colors.HexColor(score_color), alignment=TA_CENTER)
+        for score_color in ('#ef4444', '#f59e0b', '#22c55e')
+    )
+
+    # Colour of the title and the divider lines
+    ACCENT_COLOR = colors.HexColor('#6c63ff')
+
+
+# ============================================================
+# FIXED REPORT TEXT
+# The same in every report. Only the text is shared: reportlab
+# stores layout state on each Paragraph while building a PDF, so
+# the flowables themselves are created fresh for every report.
+# ============================================================
+
+RECOMMENDATIONS = tuple(f"• {rec}" for rec in (
+    "Tailor your resume keywords to match the job description.",
+    "Quantify your achievements with numbers and percentages.",
+    "Add links to GitHub, portfolio, or LinkedIn profile.",
+    "Keep resume to 1-2 pages with clean formatting.",
+    "Learn the missing skills via online courses (Coursera, Udemy)."
+))
+
+FOOTER_TEXT = "Generated by AI Resume Skill Matcher | Advanced Career Intelligence System"
+
+
+# ============================================================
+# OUTPUT FOLDER
+# ============================================================
+
+# Reports are private, so they're kept in the app's instance folder
+# (Flask's app.instance_path), not under static/ which Flask serves to
+# anyone. They're only sent through /api/download-report, which checks
+# that the analysis belongs to the logged-in user.
+PROJECT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORTS_FOLDER = os.path.join(PROJECT_FOLDER, 'instance', 'reports')
+
+# Set once the folder is known to exist, so later reports skip the check
+reports_folder_ready = False
+
+
+def report_filepath(analysis, username):
+    """
+    Where the report for this analysis is saved.
+
+    The name includes a hash of everything printed in the report, so an
+    existing file can be reused as-is: if anything changed, the name
+    changes too and a new report is built.
+    """
+    printed = (analysis['id'], analysis['ats_score'], analysis['created_at'][:10],
+               analysis['resume_filename'], username,
+               parse_skills(analysis['matched_skills']), parse_skills(analysis['missing_skills']))
+    key = hashlib.blake2b(repr(printed).encode(), digest_size=16).hexdigest()
+    return os.path.join(REPORTS_FOLDER, f"report_{analysis['id']}_{key}.pdf")
+
+
+def parse_skills(skills):
+    """
+    A skills column as a list. psycopg2 normally hands JSONB columns
+    back already parsed; a cursor set up with json_as_text() (see
+    database.py) gives JSON text instead, which is parsed here.
+    """
+    if isinstance(skills, str):
+        return orjson.loads(skills)
+    return skills or []
+
+
+def ensure_reports_folder():
+    """Create the reports folder the first time a report is written."""
+    global reports_folder_ready
+    if not reports_folder_ready:
+        os.makedirs(REPORTS_FOLDER, exist_ok=True)
+        reports_folder_ready = True
+
+
+# ============================================================
+# ONE BUILD PER REPORT
+# If the same report is downloaded twice at once, the first
+# request builds it and the second waits, then reuses the file
+# ============================================================
+
+# File path -> lock held while that report is being built
+report_build_locks = {}
+reports_lock       = threading.Lock()
+
+
+def report_build_lock(filepath):
+    """The lock for building the report saved at filepath."""
+    with reports_lock:
+        return report_build_locks.setdefault(filepath, threading.Lock())
+
+
+def forget_report_build_lock(filepath, lock):
+    """Drop a report's lock once the file exists; nobody needs to wait for it any more."""
+    with reports_lock:
+        if report_build_locks.get(filepath) is lock:
+            del report_build_locks[filepath]
+
+
+def generate_pdf_report(analysis, username, filepath=None):
     """
     Create a PDF report with the analysis results.
 
     analysis = the database row with all the analysis data
     username = name of the person who ran the analysis
-    Returns the path to the generated PDF file.
+    filepath = where to save the PDF (optional, report_filepath() is
+               used if not given)
+    If the report already exists, it is returned without building it
+    again. Returns the path to the generated PDF file.
     """
-    try:
-        # Try to use reportlab (pip install reportlab)
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-        from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer,
-                                         Table, TableStyle, HRFlowable)
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT
-
-        # Create output folder if it doesn't exist
-        reports_folder = 'static/reports'
-        os.makedirs(reports_folder, exist_ok=True)
-
-        # File path for the PDF
-        filename  = f"report_{analysis['id']}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
-        filepath  = os.path.join(reports_folder, filename)
-
-        # Parse JSON strings back to lists
-        matched_skills = json.loads(analysis['matched_skills']) if analysis['matched_skills'] else []
-        missing_skills = json.loads(analysis['missing_skills']) if analysis['missing_skills'] else []
-
-        # ---- Create PDF document ----
-        doc = SimpleDocTemplate(
-            filepath,
-            pagesize=A4,
-            rightMargin=inch,
-            leftMargin=inch,
-            topMargin=inch,
-            bottomMargin=inch
-        )
-
-        # Get default styles
-        styles = getSampleStyleSheet()
-
-        # Create custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#6c63ff'),
-            alignment=TA_CENTER,
-            spaceAfter=12
-        )
-
-        header_style = ParagraphStyle(
-            'CustomHeader',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#2d3748'),
-            spaceAfter=8
-        )
-
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=11,
-            spaceAfter=6
-        )
-
-        # ---- Build content ----
-        content = []
+    # If reportlab is not installed, create a simple text file instead
+    if not REPORTLAB_OK:
+        return write_text_report(analysis)
+
+    # File path for the PDF
+    if filepath is None:
+        filepath = report_filepath(analysis, username)
+
+    lock = report_build_lock(filepath)
+    with lock:
+        # Checked again inside the lock: another request may have
+        # just finished building this same report
+        if not os.path.exists(filepath):
+            build_pdf_report(analysis, username, filepath)
+        forget_report_build_lock(filepath, lock)
+    return filepath
+
+
+def build_pdf_report(analysis, username, filepath):
+    """Build the PDF report and save it at filepath."""
+    # Create output folder if it doesn't exist
+    ensure_reports_folder()
+
+    # Parse JSON strings back to lists
+    matched_skills = parse_skills(analysis['matched_skills'])
+    missing_skills = parse_skills(analysis['missing_skills'])
+
+    # ---- Create PDF document ----
+    # Built in memory, then written to disk in one go
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=inch,
+        leftMargin=inch,
+        topMargin=inch,
+        bottomMargin=inch
+    )
+
+    # ---- Build content ----
+    # Each threshold passed moves one step up: 0 = red, 1 = amber, 2 = green
+    score_style  = SCORE_STYLES[(analysis['ats_score'] >= 30) + (analysis['ats_score'] >= 60)]
+    matched_text = escape(", ".join(matched_skills)) if matched_skills else "No matching skills found."
+    missing_text = escape(", ".join(missing_skills)) if missing_skills else "No missing skills — great match!"
 
+    content = [
         # Title
-        content.append(Paragraph("🎯 ATS Resume Analysis Report", title_style))
-        content.append(HRFlowable(width="100%", color=colors.HexColor('#6c63ff')))
-        content.append(Spacer(1, 0.2*inch))
+        Paragraph("🎯 ATS Resume Analysis Report", TITLE_STYLE),
+        HRFlowable(width="100%", color=ACCENT_COLOR),
+        Spacer(1, 0.2*inch),
 
         # Info section
-        content.append(Paragraph(f"<b>Analyzed by:</b> {username}", normal_style))
-        content.append(Paragraph(f"<b>Date:</b> {analysis['created_at'][:10]}", normal_style))
-        content.append(Paragraph(f"<b>Resume File:</b> {analysis['resume_filename']}", normal_style))
-        content.append(Spacer(1, 0.2*inch))
+        # Paragraph text is markup (<b>...</b>), so user-supplied values are
+        # escaped — a name like "<dev>" would otherwise break the report
+        Paragraph(f"<b>Analyzed by:</b> {escape(username)}", NORMAL_STYLE),
+        Paragraph(f"<b>Date:</b> {analysis['created_at'][:10]}", NORMAL_STYLE),
+        Paragraph(f"<b>Resume File:</b> {escape(analysis['resume_filename'])}", NORMAL_STYLE),
+        Spacer(1, 0.2*inch),
 
         # ATS Score (big number)
-        score_color = '#22c55e' if analysis['ats_score'] >= 60 else '#f59e0b' if analysis['ats_score'] >= 30 else '#ef4444'
-        score_style = ParagraphStyle(
-            'Score',
-            parent=styles['Normal'],
-            fontSize=40,
-            textColor=colors.HexColor(score_color),
-            alignment=TA_CENTER
-        )
-        content.append(Paragraph(f"{analysis['ats_score']}%", score_style))
-        content.append(Paragraph("ATS Score", ParagraphStyle(
-            'ScoreLabel', parent=styles['Normal'], alignment=TA_CENTER, fontSize=12)))
-        content.append(Spacer(1, 0.3*inch))
+        Paragraph(f"{analysis['ats_score']}%", score_style),
+        Paragraph("ATS Score", SCORE_LABEL_STYLE),
+        Spacer(1, 0.3*inch),
 
         # Matched Skills
-        content.append(HRFlowable(width="100%", color=colors.lightgrey))
-        content.append(Spacer(1, 0.1*inch))
-        content.append(Paragraph("✅ Matched Skills", header_style))
-        if matched_skills:
-            skills_text = ", ".join(matched_skills)
-            content.append(Paragraph(skills_text, normal_style))
-        else:
-            content.append(Paragraph("No matching skills found.", normal_style))
-        content.append(Spacer(1, 0.2*inch))
+        HRFlowable(width="100%", color=colors.lightgrey),
+        Spacer(1, 0.1*inch),
+        Paragraph("✅ Matched Skills", HEADER_STYLE),
+        Paragraph(matched_text, NORMAL_STYLE),
+        Spacer(1, 0.2*inch),
 
         # Missing Skills
-        content.append(Paragraph("❌ Missing Skills (Skill Gap)", header_style))
-        if missing_skills:
-            skills_text = ", ".join(missing_skills)
-            content.append(Paragraph(skills_text, normal_style))
-        else:
-            content.append(Paragraph("No missing skills — great match!", normal_style))
-        content.append(Spacer(1, 0.2*inch))
+        Paragraph("❌ Missing Skills (Skill Gap)", HEADER_STYLE),
+        Paragraph(missing_text, NORMAL_STYLE),
+        Spacer(1, 0.2*inch),
 
         # Recommendations
-        content.append(Paragraph("💡 Recommendations", header_style))
-        recs = [
-            "Tailor your resume keywords to match the job description.",
-            "Quantify your achievements with numbers and percentages.",
-            "Add links to GitHub, portfolio, or LinkedIn profile.",
-            "Keep resume to 1-2 pages with clean formatting.",
-            "Learn the missing skills via online courses (Coursera, Udemy)."
-        ]
-        for rec in recs:
-            content.append(Paragraph(f"• {rec}", normal_style))
-
-        content.append(Spacer(1, 0.3*inch))
-        content.append(HRFlowable(width="100%", color=colors.HexColor('#6c63ff')))
-        content.append(Paragraph(
-            "Generated by AI Resume Skill Matcher | Advanced Career Intelligence System",
-            ParagraphStyle('Footer', parent=styles['Normal'], alignment=TA_CENTER,
-                           fontSize=9, textColor=colors.grey)
-        ))
-
-        # Build the PDF
-        doc.build(content)
-        return filepath
-
-    except ImportError:
-        # If reportlab is not installed, create a simple text file instead
-        reports_folder = 'static/reports'
-        os.makedirs(reports_folder, exist_ok=True)
-        filepath = os.path.join(reports_folder, f"report_{analysis['id']}.txt")
-        with open(filepath, 'w') as f:
-            f.write(f"ATS Resume Report\n")
-            f.write(f"Score: {analysis['ats_score']}%\n")
-            f.write(f"Install reportlab for PDF: pip install reportlab\n")
-        return filepath
+        Paragraph("💡 Recommendations", HEADER_STYLE),
+        *[Paragraph(rec, NORMAL_STYLE) for rec in RECOMMENDATIONS],
+
+        Spacer(1, 0.3*inch),
+        HRFlowable(width="100%", color=ACCENT_COLOR),
+        Paragraph(FOOTER_TEXT, FOOTER_STYLE),
+    ]
+
+    # Build the PDF
+    doc.build(content)
+
+    # Write to a temporary name and then rename, so a download that
+    # happens at the same moment never sees a half-written file
+    temp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(buffer.getbuffer())
+    os.replace(temp_path, filepath)
+
+
+def write_text_report(analysis):
+    """
+    Used when reportlab is not installed: save a simple text file instead.
+    Returns the path to the text file.
+    """
+    ensure_reports_folder()
+    filepath = os.path.join(REPORTS_FOLDER, f"report_{analysis['id']}.txt")
+    with open(filepath, 'w') as f:
+        f.write(f"ATS Resume Report\n")
+        f.write(f"Score: {analysis['ats_score']}%\n")
+        f.write(f"Install reportlab for PDF: pip install reportlab\n")
+    return filepath